@@ -1,25 +1,134 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from sqlalchemy.orm import Session, sessionmaker
+from functools import lru_cache
+from typing import Callable, Generator, Optional
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# After a failed replica connection, send reads to the primary for this long before retrying
+REPLICA_RETRY_SECONDS = 30.0
+
+# Seconds to wait for a replica connection before failing over; keeps a blackholed host from hanging requests
+DEFAULT_REPLICA_CONNECT_TIMEOUT = 2
+
+_replica_down_until = 0.0
+
+
+def get_database_url() -> str:
+    """Build the Postgres URL from environment variables."""
+    # Load environment variables
+    load_dotenv()
+    return f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Create the engine on first use rather than at import time."""
+    return create_engine(get_database_url())
+
+
+@lru_cache()
+def get_replica_engine() -> Optional[Engine]:
+    """Engine for the read replica at POSTGRES_REPLICA_URL, or None if no replica is configured."""
+    load_dotenv()
+    replica_url = os.getenv("POSTGRES_REPLICA_URL")
+    if not replica_url:
+        return None
+    connect_timeout = int(os.getenv("POSTGRES_REPLICA_CONNECT_TIMEOUT", DEFAULT_REPLICA_CONNECT_TIMEOUT))
+    # pool_pre_ping detects connections dropped by a replica restart before they are used
+    return create_engine(
+        replica_url,
+        pool_pre_ping=True,
+        connect_args={"connect_timeout": connect_timeout},
+    )
+
+
+@lru_cache()
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
-Base = declarative_base()
+
+def get_read_engine() -> Engine:
+    """
+    Pick the engine for read-only queries.
+
+    Uses the replica when one is configured and has not failed within the last
+    REPLICA_RETRY_SECONDS, otherwise the primary.
+    """
+    replica = get_replica_engine()
+    if replica is None or time.monotonic() < _replica_down_until:
+        return get_engine()
+    return replica
+
+
+def mark_replica_down() -> None:
+    """Send reads to the primary for the next REPLICA_RETRY_SECONDS."""
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
 
 
 # Dependency to get DB session
 def get_db() -> Generator:
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(statement_timeout_ms: int) -> Callable[[], Generator]:
+    """
+    Build a dependency yielding a read-only session routed to the replica.
+
+    The statement timeout and read-only mode are set with transaction scope,
+    so they never leak into other users of the pooled connection.
+
+    Args:
+        statement_timeout_ms: Postgres statement_timeout for queries in this session
+    """
+    def begin_read_only(engine: Engine) -> Session:
+        db = Session(bind=engine, autoflush=False)
+        try:
+            db.execute(text("SET TRANSACTION READ ONLY"))
+            db.execute(
+                text("SELECT set_config('statement_timeout', :timeout, true)"),
+                {"timeout": str(statement_timeout_ms)},
+            )
+        except Exception:
+            db.close()
+            raise
+        return db
+
+    def dependency() -> Generator:
+        engine = get_read_engine()
+        try:
+            db = begin_read_only(engine)
+        except OperationalError as e:
+            if engine is get_engine():
+                raise
+            # The first statement is what connects, so this also catches a replica
+            # that went away after its last successful use
+            logger.warning(f"Read replica unavailable, failing over to primary: {e}")
+            mark_replica_down()
+            db = begin_read_only(get_engine())
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return dependency
+
+
+def is_statement_timeout(exc: OperationalError) -> bool:
+    """True if the error is Postgres cancelling a query for exceeding statement_timeout."""
+    # 57014 = query_canceled
+    return getattr(exc.orig, "pgcode", None) == "57014"
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 from . import database, schemas
 import os
 from dotenv import load_dotenv
@@ -11,6 +13,30 @@ load_dotenv()
 
 app = FastAPI(title="Medical Telegram Warehouse API", version="1.0.0")
 
+# Per-endpoint statement timeouts (ms); override with STATEMENT_TIMEOUT_MS_<ENDPOINT>
+STATEMENT_TIMEOUTS_MS = {
+    name: int(os.getenv(f"STATEMENT_TIMEOUT_MS_{name.upper()}", default))
+    for name, default in {
+        "top_products": 10000,
+        "channel_activity": 5000,
+        "search_messages": 5000,
+        "visual_content": 10000,
+    }.items()
+}
+
+# Read-only sessions routed to the replica (falls back to the primary)
+top_products_db = database.get_read_db(STATEMENT_TIMEOUTS_MS["top_products"])
+channel_activity_db = database.get_read_db(STATEMENT_TIMEOUTS_MS["channel_activity"])
+search_messages_db = database.get_read_db(STATEMENT_TIMEOUTS_MS["search_messages"])
+visual_content_db = database.get_read_db(STATEMENT_TIMEOUTS_MS["visual_content"])
+
+
+@app.exception_handler(OperationalError)
+def database_error_handler(request: Request, exc: OperationalError):
+    if database.is_statement_timeout(exc):
+        return JSONResponse(status_code=504, content={"detail": "Query timed out"})
+    return JSONResponse(status_code=503, content={"detail": "Database unavailable"})
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Medical Telegram Warehouse API"}
@@ -20,7 +46,7 @@ def health_check():
     return {"status": "healthy"}
 
 @app.get("/api/reports/top-products", response_model=List[schemas.TopProduct])
-def get_top_products(limit: int = 10, db: Session = Depends(database.get_db)):
+def get_top_products(limit: int = 10, db: Session = Depends(top_products_db)):
     """Returns the most frequently mentioned terms/products across all channels."""
     # Simplified approach: search for common medical keywords or use word frequency
     # For now, let's assume we have a way to count product mentions or just use a dummy query
@@ -39,7 +65,7 @@ def get_top_products(limit: int = 10, db: Session = Depends(database.get_db)):
     return [{"product": r[0], "mention_count": r[1]} for r in result]
 
 @app.get("/api/channels/{channel_name}/activity", response_model=List[schemas.ChannelActivity])
-def get_channel_activity(channel_name: str, db: Session = Depends(database.get_db)):
+def get_channel_activity(channel_name: str, db: Session = Depends(channel_activity_db)):
     """Returns posting activity and trends for a specific channel."""
     query = text("""
         SELECT 
@@ -56,7 +82,7 @@ def get_channel_activity(channel_name: str, db: Session = Depends(database.get_d
     return [{"date": r[0], "message_count": r[1]} for r in result]
 
 @app.get("/api/search/messages")
-def search_messages(query: str = Query(..., min_length=3), limit: int = 20, db: Session = Depends(database.get_db)):
+def search_messages(query: str = Query(..., min_length=3), limit: int = 20, db: Session = Depends(search_messages_db)):
     """Searches for messages containing a specific keyword."""
     sql_query = text("""
         SELECT 
@@ -73,7 +99,7 @@ def search_messages(query: str = Query(..., min_length=3), limit: int = 20, db:
     return [dict(row._mapping) for row in result]
 
 @app.get("/api/reports/visual-content", response_model=List[schemas.VisualContentStats])
-def get_visual_content_stats(db: Session = Depends(database.get_db)):
+def get_visual_content_stats(db: Session = Depends(visual_content_db)):
     """Returns statistics about image usage across channels."""
     query = text("""
         SELECT 
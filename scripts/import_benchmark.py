@@ -0,0 +1,121 @@
+"""
+Measure module import cost with `python -X importtime`.
+
+Each module is imported in a fresh interpreter so results are not skewed by
+modules already cached in sys.modules. Example:
+
+    python scripts/import_benchmark.py
+    python scripts/import_benchmark.py src.scraper --budget-ms 50 --top 10
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = [
+    "src.scraper",
+    "src.loader",
+    "src.yolo_detect",
+    "src.image_index",
+    "api.database",
+    "api.main",
+]
+
+
+def measure_import(module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (cumulative microseconds for the module, [(cumulative us, name), ...] for imports it pulled in)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        # The last stderr line is the exception; importtime lines may be all there is, or nothing
+        errors = [line for line in proc.stderr.strip().splitlines() if not line.startswith("import time:")]
+        detail = errors[-1] if errors else f"exit code {proc.returncode}"
+        raise RuntimeError(f"Importing {module} failed: {detail}")
+
+    return parse_importtime(proc.stderr, module)
+
+
+def parse_importtime(stderr: str, module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Extract a module's cumulative import time and the imports in its subtree.
+
+    -X importtime prints each module after the modules it imported, with those
+    nested imports indented deeper. So the subtree is the run of more-indented
+    lines just before the module's own line. Interpreter startup imports (site,
+    encodings, .pth hooks) come earlier and are not part of it.
+
+    Returns:
+        (cumulative microseconds for the module, [(cumulative us, name), ...] for imports it pulled in)
+    """
+    # Lines look like: "import time:   self [us] | cumulative | imported package",
+    # where the package name is indented two spaces per nesting level
+    lines = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        lines.append((int(fields[1]), name.strip(), len(name) - len(name.lstrip())))
+
+    for position in range(len(lines) - 1, -1, -1):
+        total, name, depth = lines[position]
+        if name == module:
+            break
+    else:
+        return 0, []
+
+    entries = []
+    for cumulative, name, nested_depth in reversed(lines[:position]):
+        if nested_depth <= depth:
+            break
+        entries.append((cumulative, name))
+    return total, entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report import time of project modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit non-zero if any module takes longer than this to import")
+    parser.add_argument("--top", type=int, default=0,
+                        help="Also show the N slowest imports pulled in by each module")
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        try:
+            total, entries = measure_import(module)
+        except RuntimeError as e:
+            print(f"{module:<20} ERROR: {e}")
+            over_budget.append(module)
+            continue
+
+        total_ms = total / 1000
+        print(f"{module:<20} {total_ms:10.1f} ms")
+        for cumulative, name in sorted(entries, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:10.1f} ms  {name}")
+
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
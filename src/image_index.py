@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# dHash grid: (HASH_SIZE + 1) x HASH_SIZE pixels -> HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = 8
+
+
+def dhash(image_path: Path, hash_size: int = HASH_SIZE) -> int:
+    """
+    Compute the difference hash (dHash) of an image.
+
+    The image is converted to grayscale and shrunk to (hash_size + 1) x hash_size,
+    then each bit records whether a pixel is brighter than its right neighbour.
+    Re-encodes, small crops and resizes of the same photo land within a few bits.
+    """
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = small.tobytes()  # One byte per pixel in "L" mode
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+class MultiIndexHash:
+    """
+    Multi-index hash over fixed-width integer hashes for Hamming radius search.
+
+    Each hash is split into chunk_count disjoint bit chunks and bucketed by each
+    chunk value. If two hashes are within max_distance bits, then for some chunk
+    i they differ in at most radius_i bits, where radius_i is max_distance //
+    chunk_count for the first max_distance % chunk_count + 1 chunks and one less
+    for the rest. A search therefore probes every chunk value within radius_i of
+    the query's and verifies only the hashes found there.
+
+    Few wide chunks keep buckets small even when hashes are biased toward 0 bits,
+    as dHashes of flat product shots are; the price is enumerating more
+    neighbouring chunk values per query, which is cheap dictionary lookups.
+    """
+
+    def __init__(self, max_distance: int, hash_bits: int = HASH_SIZE * HASH_SIZE, chunk_count: int = 2):
+        self.max_distance = max_distance
+        if not 1 <= chunk_count <= hash_bits:
+            raise ValueError(f"chunk_count must be between 1 and {hash_bits}, got {chunk_count}")
+
+        # (shift, mask, probe XOR masks) per chunk; widths differ by at most one bit
+        self._chunks: List[Tuple[int, int, List[int]]] = []
+        shift = 0
+        for i in range(chunk_count):
+            width = hash_bits // chunk_count + (1 if i < hash_bits % chunk_count else 0)
+            radius = max_distance // chunk_count - (0 if i <= max_distance % chunk_count else 1)
+            probes = [
+                sum(1 << bit for bit in bits)
+                for r in range(radius + 1)
+                for bits in combinations(range(width), r)
+            ]
+            self._chunks.append((shift, (1 << width) - 1, probes))
+            shift += width
+
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._chunks]
+        self._hashes: List[int] = []
+        self._payloads: list = []
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, value: int, payload) -> None:
+        """Insert a hash with an associated payload."""
+        slot = len(self._hashes)
+        self._hashes.append(value)
+        self._payloads.append(payload)
+        for buckets, (shift, mask, _) in zip(self._buckets, self._chunks):
+            buckets.setdefault((value >> shift) & mask, []).append(slot)
+
+    def candidates(self, value: int) -> set:
+        """Slots of all stored hashes that must be verified for a search around value."""
+        slots = set()
+        for buckets, (shift, mask, probes) in zip(self._buckets, self._chunks):
+            key = (value >> shift) & mask
+            for probe in probes:
+                bucket = buckets.get(key ^ probe)
+                if bucket:
+                    slots.update(bucket)
+        return slots
+
+    def search(self, value: int) -> List[Tuple[int, int, object]]:
+        """
+        Find all entries within max_distance of value.
+
+        Returns:
+            List of (distance, hash, payload) tuples sorted by distance
+        """
+        matches = []
+        for slot in self.candidates(value):
+            distance = hamming_distance(value, self._hashes[slot])
+            if distance <= self.max_distance:
+                matches.append((distance, self._hashes[slot], self._payloads[slot]))
+
+        matches.sort(key=lambda m: m[0])
+        return matches
+
+    def nearest(self, value: int) -> Optional[Tuple[int, int, object]]:
+        """Return the closest (distance, hash, payload) within max_distance, or None."""
+        matches = self.search(value)
+        return matches[0] if matches else None
+
+
+class ImageHashIndex:
+    """
+    Perceptual-hash index mapping images to previously computed detections.
+
+    Entries are persisted as JSON
+    ({image_path: {"hash": ..., "detections": ..., "source": ...}}) so that later
+    runs can reuse detections for images seen before. Only images whose
+    detections came from the model (source is None) are searchable as
+    duplicates; entries that reused another image's detections are kept for
+    exact-path lookups only, so reuse never chains across re-encodes.
+    """
+
+    def __init__(self, max_distance: int = 5):
+        self.max_distance = max_distance
+        self._hashes = MultiIndexHash(max_distance)
+        self._entries: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, image_path: str) -> bool:
+        return image_path in self._entries
+
+    def get(self, image_path: str) -> Optional[dict]:
+        """Return the stored entry for an exact image path, if any."""
+        return self._entries.get(image_path)
+
+    def add(self, image_path: str, image_hash: int, detections: dict, source: Optional[str] = None) -> None:
+        """
+        Index an image hash together with its detections.
+
+        Args:
+            image_path: Path identifying the image
+            image_hash: dHash of the image
+            detections: Detections for the image
+            source: Path of the image whose detections were reused, or None if
+                the detections were computed for this image
+        """
+        entry = {"hash": image_hash, "detections": detections, "source": source}
+        self._entries[image_path] = entry
+        if source is None:
+            self._hashes.add(image_hash, image_path)
+
+    def find_duplicate(self, image_hash: int) -> Optional[Tuple[str, dict]]:
+        """
+        Look up the closest source image (one with model detections) within max_distance.
+
+        Returns:
+            (image_path, entry) of the nearest match, or None
+        """
+        match = self._hashes.nearest(image_hash)
+        if match is None:
+            return None
+        _, _, image_path = match
+        return image_path, self._entries[image_path]
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        return iter(self._entries.items())
+
+    def save(self, path: Path) -> None:
+        """Write the index to a JSON file, replacing it atomically so a crash mid-write keeps the old one."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, max_distance: int = 5) -> "ImageHashIndex":
+        """Load an index from a JSON file, returning an empty index if missing or corrupt."""
+        index = cls(max_distance=max_distance)
+        if not path.exists():
+            return index
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read image hash index {path}: {e}")
+            return index
+
+        for image_path, entry in entries.items():
+            index.add(image_path, int(entry["hash"]), entry["detections"], entry.get("source"))
+        return index
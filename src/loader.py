@@ -1,39 +1,131 @@
 import os
 import json
-import pandas as pd
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
 import logging
+import time
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sqlalchemy.engine import Engine
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# The swap gives up waiting for readers' locks after SWAP_LOCK_TIMEOUT and retries,
+# instead of queueing an exclusive lock request that would block every new reader
+SWAP_LOCK_TIMEOUT = "5s"
+SWAP_MAX_ATTEMPTS = 5
+SWAP_RETRY_DELAY_SECONDS = 10.0
 
-def get_db_engine() -> Engine:
+def get_db_engine() -> "Engine":
     """Create a SQLAlchemy engine from environment variables."""
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    # Load environment variables
+    load_dotenv()
+
     user = os.getenv('POSTGRES_USER')
     password = os.getenv('POSTGRES_PASSWORD')
     host = os.getenv('POSTGRES_HOST')
     port = os.getenv('POSTGRES_PORT')
     db = os.getenv('POSTGRES_DB')
     
-    url = f"postgresql://{user}:{password}@{host}:{port}/{db}"
+    url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}"
     return create_engine(url)
 
-def create_raw_schema(engine: Engine):
+def create_raw_schema(engine: "Engine"):
     """Create the raw schema if it doesn't exist."""
+    from sqlalchemy import text
+
     with engine.connect() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw"))
         conn.commit()
     logger.info("Checked/Created raw schema.")
 
+# Views (and materialized views) depending on a table, directly or through other views,
+# ordered so each comes after the views it reads from
+DEPENDENT_VIEWS_SQL = """
+    WITH RECURSIVE deps(oid, depth) AS (
+        SELECT r.ev_class, 1
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        WHERE d.classid = CAST('pg_rewrite' AS regclass)
+          AND d.refobjid = to_regclass(:qualified_name)
+          AND r.ev_class <> d.refobjid
+        UNION
+        SELECT r.ev_class, deps.depth + 1
+        FROM deps
+        JOIN pg_depend d ON d.refobjid = deps.oid
+        JOIN pg_rewrite r ON r.oid = d.objid
+        WHERE d.classid = CAST('pg_rewrite' AS regclass)
+          AND r.ev_class <> deps.oid
+    )
+    SELECT n.nspname, c.relname, c.relkind, pg_get_viewdef(c.oid)
+    FROM deps
+    JOIN pg_class c ON c.oid = deps.oid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('v', 'm')
+    GROUP BY n.nspname, c.relname, c.relkind, c.oid
+    ORDER BY max(deps.depth)
+"""
+
+def replace_table(df: "pd.DataFrame", table: str, engine: "Engine", schema: str = "raw") -> None:
+    """
+    Replace schema.table with the contents of df without exposing a partial table.
+
+    The data is written to a staging table first, then swapped in by renames in a
+    single short transaction, so readers see either the old or the new table and
+    never wait on the bulk load. Views over the old table (e.g. dbt staging views)
+    are dropped with it and recreated from their definitions in the same
+    transaction; if a view no longer fits the new columns the swap rolls back.
+    Grants on recreated views are not carried over.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    staging = f"{table}__staging"
+    old = f"{table}__old"
+
+    df.to_sql(staging, engine, schema=schema, if_exists='replace', index=False)
+
+    for attempt in range(1, SWAP_MAX_ATTEMPTS + 1):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'"))
+                # Capture view definitions before the rename, while they still name the live table
+                views = conn.execute(
+                    text(DEPENDENT_VIEWS_SQL), {"qualified_name": f"{schema}.{table}"}
+                ).fetchall()
+                conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{old} CASCADE"))
+                conn.execute(text(f"ALTER TABLE IF EXISTS {schema}.{table} RENAME TO {old}"))
+                conn.execute(text(f"ALTER TABLE {schema}.{staging} RENAME TO {table}"))
+                conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{old} CASCADE"))
+                for view_schema, view_name, relkind, definition in views:
+                    kind = "MATERIALIZED VIEW" if relkind == "m" else "VIEW"
+                    # Raw SQL so ":name" or "%" inside the definition is not taken for a parameter
+                    conn.exec_driver_sql(
+                        f'CREATE {kind} "{view_schema}"."{view_name}" AS {definition.rstrip().rstrip(";")}'
+                    )
+            if views:
+                logger.info(
+                    f"Recreated views on {schema}.{table}: "
+                    + ", ".join(f"{view_schema}.{view_name}" for view_schema, view_name, _, _ in views)
+                )
+            return
+        except OperationalError as e:
+            if attempt == SWAP_MAX_ATTEMPTS:
+                raise
+            logger.warning(
+                f"Swap of {schema}.{table} blocked by readers (attempt {attempt}/{SWAP_MAX_ATTEMPTS}): {e}. "
+                f"Retrying in {SWAP_RETRY_DELAY_SECONDS}s"
+            )
+            time.sleep(SWAP_RETRY_DELAY_SECONDS)
+
 def load_json_to_postgres():
     """Read JSON files from data lake and load into PostgreSQL raw schema."""
+    import pandas as pd
+
     engine = get_db_engine()
     create_raw_schema(engine)
     
@@ -71,19 +163,15 @@ def load_json_to_postgres():
     
     # Load to PostgreSQL
     try:
-        df.to_sql(
-            'telegram_messages', 
-            engine, 
-            schema='raw', 
-            if_exists='replace', 
-            index=False
-        )
+        replace_table(df, 'telegram_messages', engine, schema='raw')
         logger.info(f"Successfully loaded {len(df)} messages into raw.telegram_messages table.")
     except Exception as e:
         logger.error(f"Error loading telegram_messages to database: {e}")
 
 def load_yolo_to_postgres():
     """Read YOLO results CSV and load into PostgreSQL raw schema."""
+    import pandas as pd
+
     engine = get_db_engine()
     
     csv_path = Path("data/processed/yolo_results.csv")
@@ -93,17 +181,13 @@ def load_yolo_to_postgres():
 
     try:
         df = pd.read_csv(csv_path)
-        df.to_sql(
-            'yolo_detections', 
-            engine, 
-            schema='raw', 
-            if_exists='replace', 
-            index=False
-        )
+        replace_table(df, 'yolo_detections', engine, schema='raw')
         logger.info(f"Successfully loaded {len(df)} YOLO detections into raw.yolo_detections table.")
     except Exception as e:
         logger.error(f"Error loading yolo_detections to database: {e}")
 
 if __name__ == "__main__":
+    # Setup logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     load_json_to_postgres()
     load_yolo_to_postgres()
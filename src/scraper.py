@@ -7,31 +7,15 @@ import sys
 import random
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
-from dotenv import load_dotenv
-from telethon import TelegramClient
-from telethon.errors import FloodWaitError
-from telethon.tl.types import MessageMediaPhoto
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from telethon import TelegramClient
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-load_dotenv()
-
-# Validate required environment variables before proceeding
-api_id_str = os.getenv("TG_API_ID")
-api_hash = os.getenv("TG_API_HASH")
-
-if not api_id_str or not api_hash:
-    print("ERROR: Missing TG_API_ID or TG_API_HASH in .env file")
-    print("Create a .env file with:")
-    print("  TG_API_ID=your_api_id")
-    print("  TG_API_HASH=your_api_hash")
-    sys.exit(1)
-
-api_id = int(api_id_str)
-
 # Date string for partitioning output files
 TODAY = datetime.today().strftime("%Y-%m-%d")
 
@@ -41,30 +25,66 @@ DEFAULT_CHANNEL_DELAY_MAX = 60.0
 DEFAULT_MESSAGE_DELAY_MIN = 2.0
 DEFAULT_MESSAGE_DELAY_MAX = 5.0
 
+LOG_DIR = "logs"
+
+logger = logging.getLogger("telegram_scraper")
+
+
+def load_credentials() -> Tuple[int, str]:
+    """
+    Load and validate Telegram API credentials from the environment / .env file.
+
+    Exits the process if TG_API_ID or TG_API_HASH is missing.
+
+    Returns:
+        (api_id, api_hash)
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    api_id_str = os.getenv("TG_API_ID")
+    api_hash = os.getenv("TG_API_HASH")
+
+    if not api_id_str or not api_hash:
+        print("ERROR: Missing TG_API_ID or TG_API_HASH in .env file")
+        print("Create a .env file with:")
+        print("  TG_API_ID=your_api_id")
+        print("  TG_API_HASH=your_api_hash")
+        sys.exit(1)
+
+    return int(api_id_str), api_hash
+
 # =============================================================================
 # LOGGING SETUP
 # =============================================================================
 
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+def setup_logging(log_dir: str = LOG_DIR) -> None:
+    """
+    Configure the scraper logger to write to both a dated log file and the console.
 
-# Configure logging to both file and console
-logger = logging.getLogger("telegram_scraper")
-logger.setLevel(logging.INFO)
+    Args:
+        log_dir: Directory for the scrape_<date>.log file
+    """
+    if logger.handlers:
+        return
 
-# File handler - logs everything to file
-file_handler = logging.FileHandler(
-    os.path.join(LOG_DIR, f"scrape_{TODAY}.log"),
-    encoding="utf-8"
-)
-file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    os.makedirs(log_dir, exist_ok=True)
+    logger.setLevel(logging.INFO)
 
-# Console handler - shows progress in terminal
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    # File handler - logs everything to file
+    file_handler = logging.FileHandler(
+        os.path.join(log_dir, f"scrape_{TODAY}.log"),
+        encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+    # Console handler - shows progress in terminal
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -129,7 +149,7 @@ def write_manifest(base_path: str, date_str: str, channel_message_counts: dict)
 # =============================================================================
 
 async def scrape_channel(
-    client: TelegramClient,
+    client: "TelegramClient",
     channel: str,
     base_path: str,
     date_str: str,
@@ -138,6 +158,8 @@ async def scrape_channel(
     """
     Scrape a single Telegram channel and save messages + images.
     """
+    from telethon.errors import FloodWaitError
+
     channel_name = channel.strip('@')
     retries = 0
     max_retries = 3
@@ -197,7 +219,7 @@ async def scrape_channel(
 
 
 async def scrape_all_channels(
-    client: TelegramClient,
+    client: "TelegramClient",
     channels: List[str],
     base_path: str,
     limit: int = 100,
@@ -226,12 +248,17 @@ async def scrape_all_channels(
     logger.info(f"Scraping complete. Total: {sum(stats.values())}")
     return stats
 
-if __name__ == "__main__":
+def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--path", type=str, default="data")
     parser.add_argument("--limit", type=int, default=100)
     args = parser.parse_args()
 
+    api_id, api_hash = load_credentials()
+    setup_logging()
+
+    from telethon import TelegramClient
+
     client = TelegramClient("telegram_scraper_session", api_id, api_hash)
     
     target_channels = [
@@ -241,8 +268,12 @@ if __name__ == "__main__":
         '@Thequorachannel',
     ]
 
-    async def main():
+    async def run():
         async with client:
             await scrape_all_channels(client, target_channels, args.path, args.limit)
 
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,13 @@ import os
 import csv
 import logging
 from pathlib import Path
-import torch
 import functools
-# Monkeypatch torch.load to fix PyTorch 2.6+ weights_only issue
-torch.load = functools.partial(torch.load, weights_only=False)
 
-from ultralytics import YOLO
-import pandas as pd
+try:
+    from src.image_index import ImageHashIndex, dhash
+except ImportError:  # Run as a script: python src/yolo_detect.py
+    from image_index import ImageHashIndex, dhash
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Project paths
@@ -20,9 +17,13 @@ DATA_DIR = BASE_DIR / "data"
 IMAGES_DIR = DATA_DIR / "raw" / "images"
 PROCESSED_DIR = DATA_DIR / "processed"
 OUTPUT_CSV = PROCESSED_DIR / "yolo_results.csv"
+HASH_INDEX_PATH = PROCESSED_DIR / "image_hash_index.json"
 
-# Create processed directory if it doesn't exist
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+# Max Hamming distance (out of 64 bits) for two images to count as duplicates
+DUPLICATE_MAX_DISTANCE = 5
+
+# Write the hash index after this many new entries, so an interrupted run keeps its work
+HASH_INDEX_SAVE_EVERY = 500
 
 # YOLOv8 classes (COCO dataset)
 # 0: person
@@ -62,11 +63,30 @@ def classify_image(results):
     else:
         return "other", detected_classes
 
+def load_model(weights: str = "yolov8n.pt"):
+    """
+    Load the YOLO model.
+
+    torch and ultralytics are imported here rather than at module level so that
+    helpers like classify_image can be imported without paying their startup cost.
+    """
+    import torch
+    # Monkeypatch torch.load to fix PyTorch 2.6+ weights_only issue
+    torch.load = functools.partial(torch.load, weights_only=False)
+
+    from ultralytics import YOLO
+    return YOLO(weights)
+
 def main():
+    import pandas as pd
+
     logger.info("Starting YOLO detection...")
+
+    # Create processed directory if it doesn't exist
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Load model
-    model = YOLO("yolov8n.pt")
+    # Loaded on the first image that needs inference, so fully cached runs skip torch entirely
+    model = None
     
     results_list = []
     
@@ -75,49 +95,93 @@ def main():
         logger.warning(f"Images directory not found: {IMAGES_DIR}")
         return
 
+    hash_index = ImageHashIndex.load(HASH_INDEX_PATH, max_distance=DUPLICATE_MAX_DISTANCE)
+    logger.info(f"Loaded image hash index with {len(hash_index)} entries")
+
     image_count = 0
-    for channel_dir in IMAGES_DIR.iterdir():
-        if channel_dir.is_dir():
-            channel_name = channel_dir.name
-            for image_path in channel_dir.glob("*.jpg"):
-                try:
-                    message_id = image_path.stem # Filename is message_id.jpg
-                    
-                    # Run inference
-                    results = model(str(image_path), verbose=False)
-                    
-                    # Classify
-                    category, detected_cls = classify_image(results)
-                    
-                    # Get max confidence (simple metric)
-                    max_conf = 0.0
-                    if results[0].boxes.conf.numel() > 0:
-                        max_conf = float(results[0].boxes.conf.max())
-
-                    results_list.append({
-                        "message_id": message_id,
-                        "channel_name": channel_name,
-                        "image_path": str(image_path.relative_to(BASE_DIR)),
-                        "detected_classes": str(list(set(detected_cls))), # Unique classes
-                        "confidence_score": max_conf,
-                        "image_category": category
-                    })
+    cached_count = 0
+    reused_count = 0
+    unsaved_count = 0
+    try:
+        for channel_dir in IMAGES_DIR.iterdir():
+            if channel_dir.is_dir():
+                channel_name = channel_dir.name
+                for image_path in channel_dir.glob("*.jpg"):
+                    try:
+                        message_id = image_path.stem # Filename is message_id.jpg
+                        rel_path = str(image_path.relative_to(BASE_DIR))
+
+                        cached = hash_index.get(rel_path)
+                        if cached is not None:
+                            image_hash = cached["hash"]
+                            detections = cached["detections"]
+                            cached_count += 1
+                        else:
+                            image_hash = dhash(image_path)
+                            source = None
+                            duplicate = hash_index.find_duplicate(image_hash)
+                            if duplicate is not None:
+                                # Near-duplicate photo: reuse its detections instead of running the model
+                                source, source_entry = duplicate
+                                detections = source_entry["detections"]
+                                reused_count += 1
+                            else:
+                                if model is None:
+                                    model = load_model()
+
+                                # Run inference
+                                results = model(str(image_path), verbose=False)
+
+                                # Classify
+                                category, detected_cls = classify_image(results)
+
+                                # Get max confidence (simple metric)
+                                max_conf = 0.0
+                                if results[0].boxes.conf.numel() > 0:
+                                    max_conf = float(results[0].boxes.conf.max())
+
+                                detections = {
+                                    "detected_classes": sorted(set(detected_cls)), # Unique classes
+                                    "confidence_score": max_conf,
+                                    "image_category": category
+                                }
+                            hash_index.add(rel_path, image_hash, detections, source)
+                            unsaved_count += 1
+                            if unsaved_count >= HASH_INDEX_SAVE_EVERY:
+                                hash_index.save(HASH_INDEX_PATH)
+                                unsaved_count = 0
+
+                        results_list.append({
+                            "message_id": message_id,
+                            "channel_name": channel_name,
+                            "image_path": rel_path,
+                            "detected_classes": str(detections["detected_classes"]),
+                            "confidence_score": detections["confidence_score"],
+                            "image_category": detections["image_category"]
+                        })
                     
-                    image_count += 1
-                    if image_count % 10 == 0:
-                        logger.info(f"Processed {image_count} images...")
+                        image_count += 1
+                        if image_count % 10 == 0:
+                            logger.info(f"Processed {image_count} images...")
                         
-                except Exception as e:
-                    logger.error(f"Error processing {image_path}: {e}")
+                    except Exception as e:
+                        logger.error(f"Error processing {image_path}: {e}")
+    finally:
+        hash_index.save(HASH_INDEX_PATH)
 
     # Save to CSV
     if results_list:
         df = pd.DataFrame(results_list)
         df.to_csv(OUTPUT_CSV, index=False)
         logger.info(f"YOLO detection complete. Results saved to {OUTPUT_CSV}")
-        logger.info(f"Total images processed: {image_count}")
+        logger.info(
+            f"Total images processed: {image_count} "
+            f"({cached_count} from previous runs, {reused_count} reused from near-duplicates)"
+        )
     else:
         logger.info("No images processed or no results generated.")
 
 if __name__ == "__main__":
+    # Setup logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     main()
@@ -0,0 +1,101 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+from api import database, main
+
+
+def _primary_engine(statements):
+    """SQLite engine standing in for Postgres: session setup statements are recorded and replaced"""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def rewrite(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+        if statement.startswith(("SET TRANSACTION", "SELECT set_config")):
+            return "SELECT 1", ()
+        return statement, parameters
+
+    return engine
+
+
+@pytest.fixture
+def engines(monkeypatch, tmp_path):
+    statements = []
+    primary = _primary_engine(statements)
+    # Connecting fails: the parent directory does not exist
+    replica = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "get_engine", lambda: primary)
+    monkeypatch.setattr(database, "get_replica_engine", lambda: replica)
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+    return primary, replica, statements
+
+
+def test_read_db_fails_over_to_primary(engines):
+    """Test that an unreachable replica sends the session to the primary and is marked down"""
+    primary, replica, statements = engines
+    assert database.get_read_engine() is replica
+
+    dependency = database.get_read_db(1234)()
+    db = next(dependency)
+    assert db.get_bind() is primary
+    assert any("set_config" in s for s in statements)
+    dependency.close()
+
+    assert database._replica_down_until > 0
+    assert database.get_read_engine() is primary
+
+
+def test_read_engine_retries_replica_after_cooldown(engines, monkeypatch):
+    """Test that the replica is used again once REPLICA_RETRY_SECONDS have passed"""
+    primary, replica, _ = engines
+    monkeypatch.setattr(database.time, "monotonic", lambda: 1000.0)
+    database.mark_replica_down()
+    assert database.get_read_engine() is primary
+
+    monkeypatch.setattr(database.time, "monotonic", lambda: 1000.0 + database.REPLICA_RETRY_SECONDS + 1)
+    assert database.get_read_engine() is replica
+
+
+def test_read_engine_without_replica_uses_primary(monkeypatch):
+    """Test that reads go to the primary when no replica is configured"""
+    primary = object()
+    monkeypatch.setattr(database, "get_engine", lambda: primary)
+    monkeypatch.setattr(database, "get_replica_engine", lambda: None)
+    assert database.get_read_engine() is primary
+
+
+class _PgError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def _operational_error(pgcode):
+    return OperationalError("SELECT 1", {}, _PgError(pgcode))
+
+
+def test_is_statement_timeout():
+    """Test that only query_canceled (57014) counts as a statement timeout"""
+    assert database.is_statement_timeout(_operational_error("57014"))
+    assert not database.is_statement_timeout(_operational_error("08006"))
+    assert not database.is_statement_timeout(OperationalError("SELECT 1", {}, Exception("boom")))
+
+
+@pytest.mark.parametrize("pgcode, status", [("57014", 504), ("08006", 503)])
+def test_database_errors_map_to_status(pgcode, status):
+    """Test that a statement timeout returns 504 and other database errors return 503"""
+    class FailingSession:
+        def execute(self, *args, **kwargs):
+            raise _operational_error(pgcode)
+
+    main.app.dependency_overrides[main.visual_content_db] = lambda: FailingSession()
+    try:
+        response = TestClient(main.app).get("/api/reports/visual-content")
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == status
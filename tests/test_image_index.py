@@ -0,0 +1,194 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from src import yolo_detect
+from src.image_index import ImageHashIndex, MultiIndexHash, dhash, hamming_distance
+
+
+def _make_image(seed, size=(400, 300)):
+    """Draw a reproducible picture of overlapping ellipses"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (rng.randrange(256),) * 3)
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+        x1, y1 = x0 + rng.randrange(40, 200), y0 + rng.randrange(40, 200)
+        draw.ellipse([x0, y0, x1, y1], fill=tuple(rng.randrange(256) for _ in range(3)))
+    return img
+
+
+def test_hamming_distance():
+    """Test bit-difference counting between hashes"""
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+
+
+def test_dhash_near_duplicates(tmp_path):
+    """Test that re-encodes and slight crops stay within the duplicate threshold and other images do not"""
+    pytest.importorskip("PIL")
+    original = _make_image(1)
+    width, height = original.size
+    original.save(tmp_path / "original.jpg", quality=95)
+    original.save(tmp_path / "reencoded.jpg", quality=40)
+    original.crop((4, 3, width - 4, height - 3)).save(tmp_path / "cropped.jpg", quality=90)
+    _make_image(2).save(tmp_path / "other.jpg", quality=95)
+
+    base = dhash(tmp_path / "original.jpg")
+    assert hamming_distance(base, dhash(tmp_path / "reencoded.jpg")) <= yolo_detect.DUPLICATE_MAX_DISTANCE
+    assert hamming_distance(base, dhash(tmp_path / "cropped.jpg")) <= yolo_detect.DUPLICATE_MAX_DISTANCE
+    assert hamming_distance(base, dhash(tmp_path / "other.jpg")) > yolo_detect.DUPLICATE_MAX_DISTANCE
+
+
+def _skewed_hashes(rng, count, p_one):
+    """Hashes whose bits are 1 with probability p_one, like dHashes of flat images"""
+    return [sum((rng.random() < p_one) << bit for bit in range(64)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("max_distance, chunk_count", [(5, 2), (8, 3), (20, 8)])
+def test_multi_index_search_matches_brute_force(max_distance, chunk_count):
+    """Test that multi-index radius search returns the same hashes as a linear scan"""
+    rng = random.Random(42)
+    hashes = _skewed_hashes(rng, 2000, 0.3)
+    index = MultiIndexHash(max_distance=max_distance, chunk_count=chunk_count)
+    for i, h in enumerate(hashes):
+        index.add(h, i)
+
+    for query in [hashes[0] ^ 0b101] + _skewed_hashes(rng, 20, 0.3):
+        expected = sorted(i for i, h in enumerate(hashes) if hamming_distance(query, h) <= max_distance)
+        found = sorted(payload for _, _, payload in index.search(query))
+        assert found == expected
+    assert index.nearest(hashes[0] ^ 0b101)[2] == 0
+
+
+def test_multi_index_candidates_on_skewed_hashes():
+    """Test that few candidates are verified per lookup when hash bits are biased toward 0"""
+    rng = random.Random(0)
+    hashes = _skewed_hashes(rng, 50_000, 0.2)
+    index = MultiIndexHash(max_distance=yolo_detect.DUPLICATE_MAX_DISTANCE)
+    for i, h in enumerate(hashes):
+        index.add(h, i)
+
+    queries = _skewed_hashes(rng, 50, 0.2)
+    mean_candidates = sum(len(index.candidates(q)) for q in queries) / len(queries)
+    # Six 11-bit exact-match chunks verify about 10% of the index on this data
+    assert mean_candidates < 0.005 * len(hashes)
+
+
+def test_index_save_and_load(tmp_path):
+    """Test that the index round-trips through JSON and finds near-duplicates"""
+    index = ImageHashIndex(max_distance=3)
+    detections = {"detected_classes": [39], "confidence_score": 0.8, "image_category": "product_display"}
+    index.add("data/raw/images/chan/1.jpg", 0xFFFF0000FFFF0000, detections)
+
+    path = tmp_path / "index.json"
+    index.save(path)
+    loaded = ImageHashIndex.load(path, max_distance=3)
+
+    assert "data/raw/images/chan/1.jpg" in loaded
+    match = loaded.find_duplicate(0xFFFF0000FFFF0001)
+    assert match is not None
+    assert match[1]["detections"] == detections
+    assert loaded.find_duplicate(0x0000FFFF0000FFFF) is None
+
+
+def test_reused_entries_are_not_duplicate_sources():
+    """Test that detections copied from a near-duplicate cannot be reused again through it"""
+    index = ImageHashIndex(max_distance=2)
+    detections = {"detected_classes": [], "confidence_score": 0.0, "image_category": "other"}
+    index.add("a.jpg", 0b0000, detections)
+    index.add("b.jpg", 0b0011, detections, source="a.jpg")
+
+    assert index.get("b.jpg")["source"] == "a.jpg"
+    assert index.find_duplicate(0b1111) is None  # 2 bits from b, 4 bits from a
+    assert index.find_duplicate(0b0001)[0] == "a.jpg"
+
+
+class _FakeTensor:
+    def __init__(self, values):
+        self.values = values
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def numel(self):
+        return len(self.values)
+
+    def max(self):
+        return max(self.values)
+
+
+class _FakeResult:
+    def __init__(self, classes, confidences):
+        self.boxes = type("Boxes", (), {"cls": _FakeTensor(classes), "conf": _FakeTensor(confidences)})()
+
+
+def _patch_paths(monkeypatch, tmp_path):
+    processed_dir = tmp_path / "data" / "processed"
+    monkeypatch.setattr(yolo_detect, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(yolo_detect, "IMAGES_DIR", tmp_path / "data" / "raw" / "images")
+    monkeypatch.setattr(yolo_detect, "PROCESSED_DIR", processed_dir)
+    monkeypatch.setattr(yolo_detect, "OUTPUT_CSV", processed_dir / "yolo_results.csv")
+    monkeypatch.setattr(yolo_detect, "HASH_INDEX_PATH", processed_dir / "image_hash_index.json")
+    images_dir = tmp_path / "data" / "raw" / "images" / "lobelia4cosmetics"
+    images_dir.mkdir(parents=True)
+    return images_dir, processed_dir
+
+
+def test_main_reuses_detections_for_near_duplicates(tmp_path, monkeypatch):
+    """Test that the model runs once for two near-duplicate images and not at all on a cached rerun"""
+    pytest.importorskip("PIL")
+    pd = pytest.importorskip("pandas")
+    images_dir, processed_dir = _patch_paths(monkeypatch, tmp_path)
+    original = _make_image(1)
+    original.save(images_dir / "1.jpg", quality=95)
+    original.save(images_dir / "2.jpg", quality=40)
+
+    calls = []
+
+    def model(path, verbose=False):
+        calls.append(path)
+        return [_FakeResult([39.0], [0.9])]
+
+    monkeypatch.setattr(yolo_detect, "load_model", lambda: model)
+    yolo_detect.main()
+
+    assert len(calls) == 1
+    df = pd.read_csv(processed_dir / "yolo_results.csv")
+    assert len(df) == 2
+    assert set(df["image_category"]) == {"product_display"}
+
+    def fail_to_load():
+        raise AssertionError("model loaded on a fully cached run")
+
+    monkeypatch.setattr(yolo_detect, "load_model", fail_to_load)
+    yolo_detect.main()
+    assert len(pd.read_csv(processed_dir / "yolo_results.csv")) == 2
+
+
+def test_main_saves_index_when_interrupted(tmp_path, monkeypatch):
+    """Test that hashes computed before a KeyboardInterrupt are kept"""
+    pytest.importorskip("PIL")
+    pytest.importorskip("pandas")
+    images_dir, processed_dir = _patch_paths(monkeypatch, tmp_path)
+    _make_image(1).save(images_dir / "1.jpg")
+    _make_image(2).save(images_dir / "2.jpg")
+
+    calls = []
+
+    def model(path, verbose=False):
+        calls.append(path)
+        if len(calls) > 1:
+            raise KeyboardInterrupt
+        return [_FakeResult([], [])]
+
+    monkeypatch.setattr(yolo_detect, "load_model", lambda: model)
+    with pytest.raises(KeyboardInterrupt):
+        yolo_detect.main()
+
+    index = ImageHashIndex.load(processed_dir / "image_hash_index.json")
+    assert len(index) == 1
+    assert index.get(str(Path(calls[0]).relative_to(tmp_path)))["detections"]["image_category"] == "other"
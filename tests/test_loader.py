@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy.exc import OperationalError
+
+from src import loader
+
+
+class _FakeConnection:
+    def __init__(self, log, views, fail_on=None):
+        self.log = log
+        self.views = views
+        self.fail_on = fail_on
+
+    def execute(self, statement, parameters=None):
+        sql = " ".join(str(statement).split())
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise OperationalError(sql, {}, Exception("canceling statement due to lock timeout"))
+        self.log.append(sql)
+        result = MagicMock()
+        result.fetchall.return_value = self.views if "pg_get_viewdef" in sql else []
+        return result
+
+    def exec_driver_sql(self, sql):
+        self.log.append(sql)
+
+
+class _FakeEngine:
+    """Engine whose transactions record statements; the first `failures` transactions fail on the rename"""
+
+    def __init__(self, views=(), failures=0):
+        self.transactions = []
+        self.views = list(views)
+        self.failures = failures
+
+    @contextmanager
+    def begin(self):
+        log = []
+        self.transactions.append(log)
+        fail_on = "ALTER TABLE IF EXISTS" if len(self.transactions) <= self.failures else None
+        yield _FakeConnection(log, self.views, fail_on)
+
+
+def test_replace_table_swaps_in_staging_table(monkeypatch):
+    """Test that data lands in a staging table and is swapped in, recreating dependent views"""
+    df = MagicMock()
+    engine = _FakeEngine(views=[("public", "stg_telegram_messages", "v", " SELECT 1 AS x\n   FROM raw.telegram_messages;")])
+
+    loader.replace_table(df, "telegram_messages", engine, schema="raw")
+
+    df.to_sql.assert_called_once_with(
+        "telegram_messages__staging", engine, schema="raw", if_exists="replace", index=False
+    )
+    statements = engine.transactions[0]
+    assert statements[0].startswith("SET LOCAL lock_timeout")
+    assert "pg_get_viewdef" in statements[1]
+    assert statements[2:] == [
+        "DROP TABLE IF EXISTS raw.telegram_messages__old CASCADE",
+        "ALTER TABLE IF EXISTS raw.telegram_messages RENAME TO telegram_messages__old",
+        "ALTER TABLE raw.telegram_messages__staging RENAME TO telegram_messages",
+        "DROP TABLE IF EXISTS raw.telegram_messages__old CASCADE",
+        'CREATE VIEW "public"."stg_telegram_messages" AS  SELECT 1 AS x\n   FROM raw.telegram_messages',
+    ]
+
+
+def test_replace_table_retries_on_lock_timeout(monkeypatch):
+    """Test that a swap blocked by readers is retried"""
+    sleeps = []
+    monkeypatch.setattr(loader.time, "sleep", sleeps.append)
+    engine = _FakeEngine(failures=2)
+
+    loader.replace_table(MagicMock(), "yolo_detections", engine)
+
+    assert len(engine.transactions) == 3
+    assert sleeps == [loader.SWAP_RETRY_DELAY_SECONDS] * 2
+    assert engine.transactions[-1][-1] == "DROP TABLE IF EXISTS raw.yolo_detections__old CASCADE"
+
+
+def test_replace_table_gives_up_after_max_attempts(monkeypatch):
+    """Test that the lock timeout error is raised once all attempts fail"""
+    monkeypatch.setattr(loader.time, "sleep", lambda seconds: None)
+    engine = _FakeEngine(failures=loader.SWAP_MAX_ATTEMPTS)
+
+    with pytest.raises(OperationalError):
+        loader.replace_table(MagicMock(), "yolo_detections", engine)
+    assert len(engine.transactions) == loader.SWAP_MAX_ATTEMPTS
+
+
+# Integration tests against the Postgres service from the CI workflow (POSTGRES_* env vars);
+# skipped when no database is reachable. They use their own schema so no real raw data is touched.
+SWAP_TEST_SCHEMA = "loader_swap_test"
+
+
+@pytest.fixture
+def pg_engine():
+    pd = pytest.importorskip("pandas")
+    from sqlalchemy import text
+
+    try:
+        engine = loader.get_db_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"Postgres not reachable: {e}")
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SWAP_TEST_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SWAP_TEST_SCHEMA}"))
+    pd.DataFrame({"message_id": [1, 2], "message_text": ["old a", "old b"]}).to_sql(
+        "telegram_messages", engine, schema=SWAP_TEST_SCHEMA, index=False
+    )
+    with engine.begin() as conn:
+        # A view on the table and a view on that view, like dbt staging models
+        conn.execute(text(
+            f"CREATE VIEW {SWAP_TEST_SCHEMA}.stg_messages AS "
+            f"SELECT message_id, upper(message_text) AS message_text "
+            f"FROM {SWAP_TEST_SCHEMA}.telegram_messages"
+        ))
+        conn.execute(text(
+            f"CREATE VIEW {SWAP_TEST_SCHEMA}.long_messages AS "
+            f"SELECT message_id FROM {SWAP_TEST_SCHEMA}.stg_messages WHERE length(message_text) > 4"
+        ))
+
+    yield engine
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SWAP_TEST_SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+def _rows(engine, relation):
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return sorted(tuple(r) for r in conn.execute(text(f"SELECT * FROM {SWAP_TEST_SCHEMA}.{relation}")))
+
+
+def test_replace_table_recreates_dependent_views_in_postgres(pg_engine, caplog):
+    """Test that both levels of views survive a swap and read the new rows"""
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"message_id": [3, 4, 5], "message_text": ["new c", "hi", "new e"]})
+
+    with caplog.at_level("INFO", logger=loader.logger.name):
+        loader.replace_table(df, "telegram_messages", pg_engine, schema=SWAP_TEST_SCHEMA)
+
+    assert _rows(pg_engine, "telegram_messages") == [(3, "new c"), (4, "hi"), (5, "new e")]
+    assert _rows(pg_engine, "stg_messages") == [(3, "NEW C"), (4, "HI"), (5, "NEW E")]
+    assert _rows(pg_engine, "long_messages") == [(3,), (5,)]
+    assert f"{SWAP_TEST_SCHEMA}.stg_messages, {SWAP_TEST_SCHEMA}.long_messages" in caplog.text
+
+
+def test_replace_table_rolls_back_when_view_no_longer_fits(pg_engine):
+    """Test that a frame missing a column used by a view leaves the old table and views in place"""
+    pd = pytest.importorskip("pandas")
+    from sqlalchemy.exc import DBAPIError
+
+    df = pd.DataFrame({"message_id": [9]})
+
+    with pytest.raises(DBAPIError):
+        loader.replace_table(df, "telegram_messages", pg_engine, schema=SWAP_TEST_SCHEMA)
+
+    assert _rows(pg_engine, "telegram_messages") == [(1, "old a"), (2, "old b")]
+    assert _rows(pg_engine, "stg_messages") == [(1, "OLD A"), (2, "OLD B")]
+    assert _rows(pg_engine, "long_messages") == [(1,), (2,)]
@@ -1,6 +1,7 @@
 import pytest
 import os
-from src.scraper import write_channel_messages_json, write_manifest
+from dotenv import load_dotenv
+from src.scraper import load_credentials, write_channel_messages_json, write_manifest
 from datetime import datetime
 import json
 
@@ -19,5 +20,22 @@ def test_write_manifest():
 
 def test_environment_variables():
     """Test that required environment variables are present"""
+    load_dotenv()
     assert os.getenv("TG_API_ID") is not None
-    assert os.getenv("TG_API_HASH") is not None
\ No newline at end of file
+    assert os.getenv("TG_API_HASH") is not None
+
+
+def test_load_credentials(monkeypatch):
+    """Test that credentials are read from the environment"""
+    monkeypatch.setenv("TG_API_ID", "12345")
+    monkeypatch.setenv("TG_API_HASH", "abc123")
+    assert load_credentials() == (12345, "abc123")
+
+
+def test_load_credentials_missing(monkeypatch):
+    """Test that missing credentials exit the process"""
+    monkeypatch.setattr("dotenv.load_dotenv", lambda *args, **kwargs: False)
+    monkeypatch.delenv("TG_API_ID", raising=False)
+    monkeypatch.delenv("TG_API_HASH", raising=False)
+    with pytest.raises(SystemExit):
+        load_credentials()
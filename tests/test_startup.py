@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from scripts.import_benchmark import parse_importtime
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["torch", "ultralytics", "telethon", "pandas", "sqlalchemy", "PIL", "dotenv"]
+
+
+@pytest.mark.parametrize("module", ["src.scraper", "src.loader", "src.yolo_detect", "src.image_index"])
+def test_import_has_no_heavy_dependencies(module, tmp_path):
+    """Test that importing a module for its helpers loads no heavy packages and creates no files"""
+    code = (
+        "import sys\n"
+        f"import {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(BASE_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_api_database_import_does_not_create_engine(tmp_path):
+    """Test that importing api.database builds no engine and opens no connection"""
+    code = (
+        "import api.database as database\n"
+        "assert database.get_engine.cache_info().currsize == 0\n"
+        "assert database.get_replica_engine.cache_info().currsize == 0\n"
+        "assert database.get_session_factory.cache_info().currsize == 0\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(BASE_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_parse_importtime_only_reports_module_subtree():
+    """Test that startup imports and the module itself are left out of the slowest-imports listing"""
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:      2000 |      35600 |   certifi",
+        "import time:       100 |      36000 | site",
+        "import time:        50 |         50 | src",
+        "import time:       300 |       1200 |     tokenize",
+        "import time:       500 |       1700 |   traceback",
+        "import time:      2600 |       7700 |   logging",
+        "import time:      2400 |      12800 | src.loader",
+    ])
+    total, entries = parse_importtime(stderr, "src.loader")
+    assert total == 12800
+    assert sorted(entries, reverse=True) == [(7700, "logging"), (1700, "traceback"), (1200, "tokenize")]
+    assert parse_importtime(stderr, "missing") == (0, [])